@@ -4,17 +4,26 @@ import os
 from datetime import datetime
 from typing import Any, Dict, List, Literal, NotRequired, TypedDict
 
+import numpy as np
 from fastapi import FastAPI, HTTPException
 from langgraph.graph import END, START, StateGraph
 from openai import AsyncOpenAI
 from pydantic import BaseModel, Field
 
 
+class MetadataEvent(BaseModel):
+    timestamp: datetime
+    interaction_type: Literal["text", "call", "ignored_message"]
+    # Range-checked once per request in recommend_action rather than per event.
+    sentiment_score: float
+    intent: str | None = None
+
+
 class RelationshipState(TypedDict):
     # Required state fields requested by the user.
     contact_name: str
     current_score: float
-    recent_metadata: List[Dict[str, Any]]
+    recent_metadata: List[MetadataEvent]
     recommended_action: str
     # Optional fields used internally by the graph.
     previous_score: NotRequired[float]
@@ -23,13 +32,6 @@ class RelationshipState(TypedDict):
     anomaly_reason: NotRequired[str]
 
 
-class MetadataEvent(BaseModel):
-    timestamp: datetime
-    interaction_type: Literal["text", "call", "ignored_message"]
-    sentiment_score: float = Field(..., ge=-1.0, le=1.0)
-    intent: str | None = None
-
-
 class RecommendationRequest(BaseModel):
     contact_name: str
     current_score: float = Field(..., ge=0.0, le=100.0)
@@ -54,28 +56,21 @@ def _get_openai_client() -> AsyncOpenAI:
     return openai_client
 
 
-def _infer_previous_score(state: RelationshipState) -> float | None:
-    if "previous_score" in state and state["previous_score"] is not None:
-        return state["previous_score"]
-
-    for event in reversed(state["recent_metadata"]):
-        candidate = event.get("previous_score")
-        if isinstance(candidate, (float, int)):
-            return float(candidate)
-    return None
-
-
 def analyze_anomaly(state: RelationshipState) -> Dict[str, Any]:
-    previous_score = _infer_previous_score(state)
+    # previous_score is only ever supplied at the top level of the request; events
+    # are validated MetadataEvent instances, whose schema has no such field, so there
+    # is nothing to scan for.
+    previous_score = state.get("previous_score")
     score_drop_threshold = 15.0
     significant_drop = (
         previous_score is not None
         and (previous_score - state["current_score"]) >= score_drop_threshold
     )
-    negative_sentiment = any(
-        float(event.get("sentiment_score", 0.0)) <= -0.35
-        for event in state["recent_metadata"]
-    )
+    negative_sentiment = False
+    for event in state["recent_metadata"]:
+        if event.sentiment_score <= -0.35:
+            negative_sentiment = True
+            break
 
     anomaly_detected = significant_drop or negative_sentiment
     if significant_drop and negative_sentiment:
@@ -124,6 +119,10 @@ async def plan_action(state: RelationshipState) -> Dict[str, Any]:
     if not os.getenv("OPENAI_API_KEY"):
         return {"recommended_action": _fallback_action(state)}
 
+    # Only the events that reach the prompt are serialized.
+    recent_sample = [
+        event.model_dump(mode="json") for event in state["recent_metadata"][:5]
+    ]
     prompt = (
         "You are an assistant for a privacy-first relationship manager.\n"
         "Return exactly one concise recommendation sentence (max 20 words).\n"
@@ -133,7 +132,7 @@ async def plan_action(state: RelationshipState) -> Dict[str, Any]:
         f"Anomaly detected: {state.get('anomaly_detected', False)}\n"
         f"Anomaly reason: {state.get('anomaly_reason', 'n/a')}\n"
         f"RAG context: {state.get('rag_context', 'No additional context')}\n"
-        f"Recent metadata sample: {state['recent_metadata'][:5]}"
+        f"Recent metadata sample: {recent_sample}"
     )
 
     try:
@@ -193,12 +192,21 @@ async def recommend_action(payload: RecommendationRequest) -> RecommendationResp
             status_code=400, detail="recent_metadata must include at least one event."
         )
 
+    sentiments = np.fromiter(
+        (event.sentiment_score for event in payload.recent_metadata),
+        dtype=np.float64,
+        count=len(payload.recent_metadata),
+    )
+    # Written so NaN fails the check, matching the old Field(ge=-1.0, le=1.0) bounds.
+    if not ((sentiments >= -1.0) & (sentiments <= 1.0)).all():
+        raise HTTPException(
+            status_code=422, detail="sentiment_score must be between -1.0 and 1.0."
+        )
+
     initial_state: RelationshipState = {
         "contact_name": payload.contact_name,
         "current_score": payload.current_score,
-        "recent_metadata": [
-            event.model_dump(mode="json") for event in payload.recent_metadata
-        ],
+        "recent_metadata": payload.recent_metadata,
         "recommended_action": "",
     }
     if payload.previous_score is not None:
@@ -210,3 +218,11 @@ async def recommend_action(payload: RecommendationRequest) -> RecommendationResp
         recommended_action=final_state["recommended_action"],
         anomaly_detected=final_state.get("anomaly_detected", False),
     )
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # uvicorn[standard] installs uvloop and httptools; "auto" picks both when importable
+    # and falls back to the stdlib asyncio loop / h11 otherwise (e.g. on Windows).
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="auto", http="auto")
@@ -17,11 +17,18 @@ python3 -m pytest -q services/ml/tests/test_scoring.py
 echo "ok"
 
 echo "[4/4] Dataset generator smoke run..."
+# Generate into a temp file so verification never rewrites the committed export.
+SYNTHETIC_TMP="$(mktemp)"
+trap 'rm -f "$SYNTHETIC_TMP"' EXIT
 python3 services/ml/scripts/generate_synthetic_dataset.py \
-  --output data/synthetic/chat_metadata_export.json \
+  --output "$SYNTHETIC_TMP" \
   --seed 42 \
   --days 30 \
   --start-date 2026-01-01T00:00:00+00:00 >/dev/null
+if ! cmp -s "$SYNTHETIC_TMP" data/synthetic/chat_metadata_export.json; then
+  echo "data/synthetic/chat_metadata_export.json is stale; regenerate it with the generator defaults (seed 42, 30 days)." >&2
+  exit 1
+fi
 echo "ok"
 
 echo "Verification complete."
@@ -1,48 +1,157 @@
 from __future__ import annotations
 
-import hashlib
-from typing import Iterable
+import asyncio
+import platform
+import threading
+from pathlib import Path
+from typing import Iterable, List, Tuple
 
+import blake3
 import numpy as np
-from openai import OpenAI
+import xxhash
+from cachetools import LRUCache
+from openai import AsyncOpenAI, OpenAI
 
 from .config import Settings
 
+LOCAL_MODEL_NAME = "all-MiniLM-L6-v2"
+LOCAL_MODEL_HF_ID = f"sentence-transformers/{LOCAL_MODEL_NAME}"
+QUANTIZED_FILE_NAME = "model_quantized.onnx"
+
+
+class QuantizedMiniLM:
+    """int8 dynamically-quantized ONNX MiniLM exposing the subset of SentenceTransformer.encode we use."""
+
+    def __init__(self, model_dir: Path):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        if not (model_dir / QUANTIZED_FILE_NAME).exists():
+            self._export_and_quantize(model_dir)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            model_dir,
+            file_name=QUANTIZED_FILE_NAME,
+            provider="CPUExecutionProvider",
+        )
+
+    @staticmethod
+    def _export_and_quantize(model_dir: Path) -> None:
+        from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        from transformers import AutoTokenizer
+
+        model_dir.mkdir(parents=True, exist_ok=True)
+        fp32_model = ORTModelForFeatureExtraction.from_pretrained(
+            LOCAL_MODEL_HF_ID,
+            export=True,
+            provider="CPUExecutionProvider",
+        )
+        AutoTokenizer.from_pretrained(LOCAL_MODEL_HF_ID).save_pretrained(model_dir)
+
+        if platform.machine().lower() in {"arm64", "aarch64"}:
+            qconfig = AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+        else:
+            qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+        ORTQuantizer.from_pretrained(fp32_model).quantize(save_dir=model_dir, quantization_config=qconfig)
+
+    def encode(self, texts: List[str], normalize_embeddings: bool = True, **_: object) -> np.ndarray:
+        inputs = self.tokenizer(
+            list(texts),
+            padding=True,
+            truncation=True,
+            max_length=256,
+            return_tensors="np",
+        )
+        token_embeddings = np.asarray(self.model(**inputs).last_hidden_state, dtype=np.float32)
+
+        # Mean pooling over non-padding tokens, matching the sentence-transformers pipeline.
+        mask = inputs["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        if normalize_embeddings:
+            pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled
+
 
 class EmbeddingClient:
-    def __init__(self, settings: Settings):
+    def __init__(
+        self,
+        settings: Settings,
+        cache_size: int = 4096,
+        batch_window_s: float = 0.01,
+        max_batch: int = 64,
+    ):
         self.settings = settings
         self._openai: OpenAI | None = None
+        self._aopenai: AsyncOpenAI | None = None
         self._local_model = None
+        # Set once neither local encoder loads, so later calls skip straight to the hash backend.
+        self._local_model_unavailable = False
+        self._local_model_id = f"local:{LOCAL_MODEL_NAME}"
+        # Keyed by xxh3_128(model + NUL + text); values are read-only float32 rows.
+        self._cache: LRUCache = LRUCache(maxsize=cache_size)
+        self._cache_lock = threading.Lock()
+        # Micro-batching state for embed_one, bound to the event loop that first uses it.
+        self.batch_window_s = batch_window_s
+        self.max_batch = max_batch
+        self._batch_queue: asyncio.Queue | None = None
+        self._batch_worker: asyncio.Task | None = None
+        self._batch_loop: asyncio.AbstractEventLoop | None = None
 
         if settings.embedding_provider == "openai" and settings.openai_api_key:
             self._openai = OpenAI(api_key=settings.openai_api_key)
+            self._aopenai = AsyncOpenAI(api_key=settings.openai_api_key)
 
     def _ensure_local_model(self):
-        if self._local_model is not None:
+        if self._local_model is not None or self._local_model_unavailable:
             return self._local_model
 
+        # Prefer the int8 ONNX encoder (cached under data_dir); fall back to PyTorch FP32.
+        try:
+            self._local_model = QuantizedMiniLM(self.settings.data_dir / "models" / f"{LOCAL_MODEL_NAME}-int8")
+            self._local_model_id = f"local:{LOCAL_MODEL_NAME}-int8"
+            return self._local_model
+        except Exception:
+            self._local_model = None
+
         try:
             from sentence_transformers import SentenceTransformer
 
-            self._local_model = SentenceTransformer("all-MiniLM-L6-v2")
+            self._local_model = SentenceTransformer(LOCAL_MODEL_NAME)
+            self._local_model_id = f"local:{LOCAL_MODEL_NAME}"
         except Exception:
             self._local_model = None
+            self._local_model_unavailable = True
         return self._local_model
 
     @staticmethod
-    def _hash_embedding(text: str, dim: int = 384) -> np.ndarray:
-        digest = hashlib.sha256(text.encode("utf-8")).digest()
-        raw = np.frombuffer((digest * ((dim // len(digest)) + 1))[:dim], dtype=np.uint8)
-        vec = (raw.astype(np.float32) / 255.0) - 0.5
-        norm = np.linalg.norm(vec)
-        return vec / norm if norm > 0 else vec
-
-    def embed_texts(self, texts: Iterable[str]) -> np.ndarray:
-        text_list = list(texts)
-        if not text_list:
-            return np.zeros((0, 384), dtype=np.float32)
+    def _hash_embeddings(texts: List[str], dim: int = 384) -> np.ndarray:
+        """Deterministic pseudo-embeddings for a batch: one (n, dim) buffer, transformed in place."""
+        # blake3 is an XOF, so each text yields exactly `dim` bytes with no repeat-and-trim step.
+        digests = b"".join(blake3.blake3(text.encode("utf-8")).digest(length=dim) for text in texts)
+        raw = np.frombuffer(digests, dtype=np.uint8).reshape(len(texts), dim)
+        vecs = raw.astype(np.float32)
+        np.divide(vecs, 255.0, out=vecs)
+        np.subtract(vecs, 0.5, out=vecs)
+        norms = np.sqrt(np.einsum("ij,ij->i", vecs, vecs))[:, None]
+        np.divide(vecs, norms, out=vecs, where=norms > 0)
+        return vecs
+
+    @staticmethod
+    def _cache_key(model: str, text: str) -> bytes:
+        # Non-cryptographic, but 128 bits keeps collisions negligible for an in-process cache.
+        return xxhash.xxh3_128_digest(f"{model}\x00{text}".encode("utf-8"))
+
+    def _active_model(self) -> str:
+        if self._openai is not None:
+            return f"openai:{self.settings.openai_embed_model}"
+        if self._ensure_local_model() is not None:
+            return self._local_model_id
+        return "hash"
 
+    def _embed_uncached(self, text_list: List[str]) -> Tuple[str, np.ndarray]:
+        """Embed with the first available backend; returns the backend id alongside vectors."""
         if self._openai is not None:
             try:
                 response = self._openai.embeddings.create(
@@ -50,7 +159,7 @@ class EmbeddingClient:
                     input=text_list,
                 )
                 vectors = [item.embedding for item in response.data]
-                return np.array(vectors, dtype=np.float32)
+                return f"openai:{self.settings.openai_embed_model}", np.array(vectors, dtype=np.float32)
             except Exception:
                 # Fail open to local fallback for resilience (bad key, quota, timeout, etc.).
                 self._openai = None
@@ -63,7 +172,112 @@ class EmbeddingClient:
                 convert_to_numpy=True,
                 show_progress_bar=False,
             )
-            return vectors.astype(np.float32)
+            return self._local_model_id, vectors.astype(np.float32)
+
+        return "hash", self._hash_embeddings(text_list)
+
+    def embed_texts(self, texts: Iterable[str], dtype: np.dtype = np.float32) -> np.ndarray:
+        """Embed texts; pass dtype=np.float16 for vectors that are only going into storage."""
+        text_list = list(texts)
+        if not text_list:
+            return np.zeros((0, 384), dtype=dtype)
+
+        model = self._active_model()
+        keys, rows, misses = self._cache_lookup(model, text_list)
+        if misses:
+            used_model, vectors = self._embed_uncached([text_list[i] for i in misses])
+            if used_model != model:
+                # The backend fell back mid-call; cached rows have another dimension, so redo the batch.
+                return self.embed_texts(text_list, dtype=dtype)
+            self._cache_store(keys, rows, misses, vectors)
+
+        return np.vstack(rows).astype(dtype, copy=False)
+
+    async def aembed_texts(self, texts: Iterable[str], dtype: np.dtype = np.float32) -> np.ndarray:
+        """embed_texts for async callers: awaits OpenAI directly, runs local/hash backends on a worker thread."""
+        text_list = list(texts)
+        if self._openai is None or self._aopenai is None or not text_list:
+            return await asyncio.to_thread(self.embed_texts, text_list, dtype)
+
+        model = f"openai:{self.settings.openai_embed_model}"
+        keys, rows, misses = self._cache_lookup(model, text_list)
+        if misses:
+            try:
+                response = await self._aopenai.embeddings.create(
+                    model=self.settings.openai_embed_model,
+                    input=[text_list[i] for i in misses],
+                )
+            except Exception:
+                # Same fail-open as the sync path: drop OpenAI and re-embed the whole batch locally.
+                self._openai = None
+                return await asyncio.to_thread(self.embed_texts, text_list, dtype)
+            vectors = np.array([item.embedding for item in response.data], dtype=np.float32)
+            self._cache_store(keys, rows, misses, vectors)
+
+        return np.vstack(rows).astype(dtype, copy=False)
+
+    def _cache_lookup(
+        self, model: str, text_list: List[str]
+    ) -> Tuple[List[bytes], List[np.ndarray | None], List[int]]:
+        keys = [self._cache_key(model, text) for text in text_list]
+        with self._cache_lock:
+            rows = [self._cache.get(key) for key in keys]
+        return keys, rows, [i for i, row in enumerate(rows) if row is None]
+
+    def _cache_store(
+        self,
+        keys: List[bytes],
+        rows: List[np.ndarray | None],
+        misses: List[int],
+        vectors: np.ndarray,
+    ) -> None:
+        vectors.setflags(write=False)
+        with self._cache_lock:
+            for i, vector in zip(misses, vectors):
+                self._cache[keys[i]] = vector
+                rows[i] = vector
+
+    async def embed_one(self, text: str) -> np.ndarray:
+        """Embed a single text, coalescing concurrent callers into one backend request."""
+        loop = asyncio.get_running_loop()
+        if self._batch_loop is not loop or self._batch_worker is None or self._batch_worker.done():
+            self._batch_loop = loop
+            self._batch_queue = asyncio.Queue()
+            self._batch_worker = loop.create_task(self._drain_batches(self._batch_queue))
+
+        future: asyncio.Future = loop.create_future()
+        self._batch_queue.put_nowait((text, future))
+        return await future
+
+    async def _drain_batches(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.batch_window_s
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                vectors = await self.aembed_texts([text for text, _ in batch])
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
 
-        vectors = [self._hash_embedding(text) for text in text_list]
-        return np.vstack(vectors).astype(np.float32)
+    async def aclose(self) -> None:
+        if self._batch_worker is not None:
+            self._batch_worker.cancel()
+            self._batch_worker = None
+        if self._aopenai is not None:
+            await self._aopenai.close()
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, TypedDict
 
+import numpy as np
+import xxhash
+from cachetools import TTLCache
 from langgraph.graph import END, START, StateGraph
 
 from .embeddings import EmbeddingClient
@@ -16,6 +20,7 @@ class FlowState(TypedDict, total=False):
     current_score: float
     previous_score: float
     recent_metadata: List[Dict[str, Any]]
+    negative_event_count: int
     recent_event_count_7d: int
     prior_event_count_7d: int
     rag_context: str
@@ -29,33 +34,48 @@ class FlowState(TypedDict, total=False):
     schedule_at: str | None
 
 
+NEGATIVE_SENTIMENT_THRESHOLD = -0.35
+# A score drop of at least this many points flags an anomaly on its own.
+ANOMALY_SCORE_DROP = 15.0
+
+
+def schedule_at_for(hours: int) -> str:
+    return (datetime.now(timezone.utc) + timedelta(hours=hours)).isoformat()
+
+
 class RelationshipFlow:
+    """Compiled anomaly -> RAG -> plan -> schedule graph.
+
+    Compiling the StateGraph is comparatively expensive, so build one instance per
+    process (the ML service keeps it on ``app.state.flow``) and reuse it; ``run`` is
+    safe to call concurrently.
+    """
+
     def __init__(self, rag_store: RagStore, embedder: EmbeddingClient, planner: PlannerLLM):
         self.rag_store = rag_store
         self.embedder = embedder
         self.planner = planner
+        # RAG context keyed by (contact_hash, xxh3(query text), contact write version).
+        self._rag_cache: TTLCache = TTLCache(maxsize=4096, ttl=300)
         self.graph = self._build_graph()
 
-    def _analyze_anomaly(self, state: FlowState) -> Dict[str, Any]:
+    async def _analyze_anomaly(self, state: FlowState) -> Dict[str, Any]:
         score_drop = float(state.get("previous_score", 50.0)) - float(
             state.get("current_score", 50.0)
         )
-        negative_signal = any(
-            float(item.get("sentiment", 0.0)) <= -0.35
-            for item in state.get("recent_metadata", [])
-        )
+        negative_signal = int(state.get("negative_event_count", 0)) > 0
         recent_freq = int(state.get("recent_event_count_7d", 0))
         prior_freq = int(state.get("prior_event_count_7d", 0))
         frequency_drop = prior_freq >= 2 and recent_freq <= int(prior_freq * 0.6)
 
-        anomaly = score_drop >= 15.0 or negative_signal or frequency_drop
+        anomaly = score_drop >= ANOMALY_SCORE_DROP or negative_signal or frequency_drop
 
         reason = "none"
         if frequency_drop:
             reason = "frequency_drop"
-        elif score_drop >= 15.0 and negative_signal:
+        elif score_drop >= ANOMALY_SCORE_DROP and negative_signal:
             reason = "drop_and_negative_sentiment"
-        elif score_drop >= 15.0:
+        elif score_drop >= ANOMALY_SCORE_DROP:
             reason = "score_drop"
         elif negative_signal:
             reason = "negative_sentiment"
@@ -69,7 +89,7 @@ class RelationshipFlow:
     def _route_after_anomaly(state: FlowState) -> str:
         return "query_rag" if state.get("anomaly_detected") else "plan_action"
 
-    def _query_rag(self, state: FlowState) -> Dict[str, Any]:
+    async def _query_rag(self, state: FlowState) -> Dict[str, Any]:
         summaries = [
             str(item.get("summary", ""))
             for item in state.get("recent_metadata", [])
@@ -78,20 +98,34 @@ class RelationshipFlow:
         if not summaries:
             return {"rag_context": "No historical context found."}
 
-        query_vector = self.embedder.embed_texts([" ".join(summaries[-3:])])[0]
-        neighbors = self.rag_store.query(
-            contact_hash=state["contact_hash"],
+        query_text = " ".join(summaries[-3:])
+        contact_hash = state["contact_hash"]
+        cache_key = (
+            contact_hash,
+            xxhash.xxh3_128_digest(query_text.encode("utf-8")),
+            self.rag_store.contact_version(contact_hash),
+        )
+        cached = self._rag_cache.get(cache_key)
+        if cached is not None:
+            return {"rag_context": cached}
+
+        # Concurrent requests share one embedding call; the SQLite lookup stays off the event loop.
+        query_vector = await self.embedder.embed_one(query_text)
+        neighbors = await asyncio.to_thread(
+            self.rag_store.query,
+            contact_hash=contact_hash,
             query_embedding=query_vector,
             k=4,
         )
         if not neighbors:
-            return {"rag_context": "No similar past summaries in vector memory."}
+            context = "No similar past summaries in vector memory."
+        else:
+            context = "\n".join(f"- {item.summary}" for item in neighbors)
 
-        snippets = [f"- {item.summary}" for item in neighbors]
-        context = "\n".join(snippets)
+        self._rag_cache[cache_key] = context
         return {"rag_context": context}
 
-    def _plan_action(self, state: FlowState) -> Dict[str, Any]:
+    async def _plan_action(self, state: FlowState) -> Dict[str, Any]:
         llm_input = {
             "contact_hash": state.get("contact_hash"),
             "alias": state.get("alias"),
@@ -102,12 +136,10 @@ class RelationshipFlow:
             "rag_context": state.get("rag_context", ""),
             "recent_metadata": state.get("recent_metadata", [])[-5:],
         }
-        return self.planner.recommend(llm_input)
+        return await self.planner.recommend(llm_input)
 
-    def _schedule_action(self, state: FlowState) -> Dict[str, Any]:
-        hours = int(state.get("schedule_in_hours", 24))
-        schedule_time = datetime.now(timezone.utc) + timedelta(hours=hours)
-        return {"schedule_at": schedule_time.isoformat()}
+    async def _schedule_action(self, state: FlowState) -> Dict[str, Any]:
+        return {"schedule_at": schedule_at_for(int(state.get("schedule_in_hours", 24)))}
 
     def _build_graph(self):
         graph = StateGraph(FlowState)
@@ -132,5 +164,17 @@ class RelationshipFlow:
 
         return graph.compile()
 
-    def run(self, state: FlowState) -> FlowState:
-        return self.graph.invoke(state)
+    @staticmethod
+    def _ingest(state: FlowState) -> FlowState:
+        # Scan recent_metadata once at ingress so graph nodes reuse the result.
+        metadata = state.get("recent_metadata", [])
+        sentiments = np.fromiter(
+            (float(item.get("sentiment", 0.0)) for item in metadata),
+            dtype=np.float64,
+            count=len(metadata),
+        )
+        negative_count = int(np.count_nonzero(sentiments <= NEGATIVE_SENTIMENT_THRESHOLD))
+        return {**state, "negative_event_count": negative_count}
+
+    async def run(self, state: FlowState) -> FlowState:
+        return await self.graph.ainvoke(self._ingest(state))
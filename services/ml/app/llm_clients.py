@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import json
 from typing import Any, Dict
 
 import httpx
-from openai import OpenAI
+import orjson
+from openai import AsyncOpenAI
 
 from .config import Settings
 
@@ -12,9 +12,26 @@ from .config import Settings
 class PlannerLLM:
     def __init__(self, settings: Settings):
         self.settings = settings
-        self._openai = None
+        self._openai: AsyncOpenAI | None = None
+        self._http: httpx.AsyncClient | None = None
         if settings.llm_provider == "openai" and settings.openai_api_key:
-            self._openai = OpenAI(api_key=settings.openai_api_key)
+            self._openai = AsyncOpenAI(api_key=settings.openai_api_key)
+
+    def _http_client(self) -> httpx.AsyncClient:
+        # Created lazily and reused so local-LLM calls share one connection pool.
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=30.0,
+                limits=httpx.Limits(max_keepalive_connections=8),
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        if self._openai is not None:
+            await self._openai.close()
 
     @staticmethod
     def _fallback_plan(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -53,14 +70,14 @@ class PlannerLLM:
             "priority(low|medium|high), schedule_in_hours(integer).\n"
             "draft_message must be 1-2 sentences, warm tone, and directly usable.\n"
             "Constraints: no raw message text persistence, metadata only.\n"
-            f"Input state: {json.dumps(state, default=str)}"
+            f"Input state: {orjson.dumps(state, default=str).decode()}"
         )
 
-    def _openai_plan(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    async def _openai_plan(self, state: Dict[str, Any]) -> Dict[str, Any]:
         if self._openai is None:
             raise RuntimeError("OpenAI client unavailable")
 
-        response = self._openai.responses.create(
+        response = await self._openai.responses.create(
             model=self.settings.openai_model,
             input=[
                 {
@@ -73,31 +90,30 @@ class PlannerLLM:
         )
 
         text = (response.output_text or "").strip()
-        return json.loads(text)
+        return orjson.loads(text)
 
-    def _local_plan(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    async def _local_plan(self, state: Dict[str, Any]) -> Dict[str, Any]:
         payload = {
             "model": "llama3.1:8b",
             "stream": False,
             "prompt": self._prompt(state),
         }
-        with httpx.Client(timeout=30.0) as client:
-            resp = client.post(self.settings.local_llm_url, json=payload)
-            resp.raise_for_status()
-            data = resp.json()
+        resp = await self._http_client().post(self.settings.local_llm_url, json=payload)
+        resp.raise_for_status()
+        data = resp.json()
 
         candidate = data.get("response", "{}").strip()
-        return json.loads(candidate)
+        return orjson.loads(candidate)
 
-    def recommend(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    async def recommend(self, state: Dict[str, Any]) -> Dict[str, Any]:
         result: Dict[str, Any]
         try:
             if self._openai is not None:
-                result = self._openai_plan(state)
+                result = await self._openai_plan(state)
                 return self._sanitize_output(result, state)
 
             if self.settings.llm_provider == "local":
-                result = self._local_plan(state)
+                result = await self._local_plan(state)
                 return self._sanitize_output(result, state)
         except Exception:
             pass
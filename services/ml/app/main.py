@@ -1,30 +1,59 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List
 
-from fastapi import FastAPI
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
 
 from .config import get_settings
 from .embeddings import EmbeddingClient
-from .langgraph_flow import RelationshipFlow
+from .langgraph_flow import RelationshipFlow, schedule_at_for
 from .llm_clients import PlannerLLM
 from .models import (
     IngestRequest,
+    MetadataEvent,
     ProcessContactRequest,
     ProcessContactResponse,
     RecommendRequest,
     ScoreRequest,
 )
 from .rag_store import RagStore
-from .scoring import ScoringHyperParams, band_for_score, compute_relationship_score, risk_level_for_score, train_temporal_decay
+from .scoring import (
+    ScoringHyperParams,
+    band_for_score,
+    compute_relationship_score,
+    prepare_events,
+    risk_level_for_score,
+    train_temporal_decay,
+)
+from .semantic_cache import SemanticCache
 
 settings = get_settings()
 embedder = EmbeddingClient(settings)
 rag_store = RagStore(settings.data_dir)
 planner = PlannerLLM(settings)
-flow = RelationshipFlow(rag_store=rag_store, embedder=embedder, planner=planner)
 
-app = FastAPI(title="bubbleOne ML Service", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Compile the LangGraph flow once per process; routes read it from app.state.
+    app.state.flow = RelationshipFlow(rag_store=rag_store, embedder=embedder, planner=planner)
+    app.state.flow_cache = SemanticCache(ttl=60.0)
+    yield
+    # Stop the embedding batcher and release pooled keep-alive connections.
+    await embedder.aclose()
+    await planner.aclose()
+
+
+app = FastAPI(
+    title="bubbleOne ML Service",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 
 @app.get("/health")
@@ -36,30 +65,60 @@ def health() -> Dict[str, str]:
     }
 
 
-@app.post("/v1/ingest")
-def ingest(payload: IngestRequest) -> Dict[str, Any]:
-    summaries = [event.summary for event in payload.events]
-    vectors = embedder.embed_texts(summaries)
-
-    inserted = 0
-    for event, vector in zip(payload.events, vectors):
-        safe_metadata = {
-            "ts": event.ts.isoformat(),
-            "interaction_type": event.interaction_type,
-            "sentiment": event.sentiment,
-            "intent": event.intent,
-            **event.metadata,
+def _event_to_flow_dict(event: MetadataEvent) -> Dict[str, Any]:
+    # Events are already validated; copy fields instead of a pydantic model_dump round-trip.
+    return {
+        "event_id": event.event_id,
+        "contact_hash": event.contact_hash,
+        "ts": event.ts,
+        "interaction_type": event.interaction_type,
+        "sentiment": event.sentiment,
+        "intent": event.intent,
+        "summary": event.summary,
+        "metadata": event.metadata,
+    }
+
+
+async def _ingest_events(events: List[MetadataEvent]) -> int:
+    summaries = [event.summary for event in events]
+    vectors = await embedder.aembed_texts(summaries, dtype=np.float16)
+
+    records = [
+        {
+            "event_id": event.event_id,
+            "contact_hash": event.contact_hash,
+            "summary": event.summary,
+            "metadata": {
+                "ts": event.ts,
+                "interaction_type": event.interaction_type,
+                "sentiment": event.sentiment,
+                "intent": event.intent,
+                **event.metadata,
+            },
         }
-        rag_store.add_record(
-            event_id=event.event_id,
-            contact_hash=event.contact_hash,
-            summary=event.summary,
-            metadata=safe_metadata,
-            embedding=vector,
-        )
-        inserted += 1
+        for event in events
+    ]
+    # SQLite and index writes block; keep them off the event loop.
+    row_ids = await asyncio.to_thread(rag_store.add_records, records, vectors)
+    return len(row_ids)
+
+
+async def _run_flow(request: Request, state: Dict[str, Any]) -> Dict[str, Any]:
+    # Planner calls dominate latency; near-duplicate states within the TTL reuse the last outcome.
+    flow = request.app.state.flow
+
+    async def plan() -> Dict[str, Any]:
+        outcome = await flow.run(state)
+        return {key: value for key, value in outcome.items() if key != "schedule_at"}
 
-    return {"inserted": inserted}
+    cached = await request.app.state.flow_cache.get_or_compute(SemanticCache.key_for(state), plan)
+    # schedule_at is relative to now, so it is derived fresh even when the plan is a cache hit.
+    return {**cached, "schedule_at": schedule_at_for(int(cached.get("schedule_in_hours", 24)))}
+
+
+@app.post("/v1/ingest")
+async def ingest(payload: IngestRequest) -> Dict[str, Any]:
+    return {"inserted": await _ingest_events(payload.events)}
 
 
 @app.post("/v1/score")
@@ -76,7 +135,7 @@ def score(payload: ScoreRequest) -> Dict[str, Any]:
 
 
 @app.post("/v1/recommend")
-def recommend(payload: RecommendRequest) -> Dict[str, Any]:
+async def recommend(payload: RecommendRequest, request: Request) -> Dict[str, Any]:
     state = {
         "contact_hash": payload.contact_hash,
         "alias": payload.alias,
@@ -84,9 +143,9 @@ def recommend(payload: RecommendRequest) -> Dict[str, Any]:
         "previous_score": payload.previous_score,
         "recent_event_count_7d": len(payload.recent_metadata),
         "prior_event_count_7d": max(len(payload.recent_metadata) - 2, 0),
-        "recent_metadata": [event.model_dump(mode="json") for event in payload.recent_metadata],
+        "recent_metadata": [_event_to_flow_dict(event) for event in payload.recent_metadata],
     }
-    result = flow.run(state)
+    result = await _run_flow(request, state)
     return {
         "recommended_action": result.get("recommended_action", "No recommendation."),
         "draft_message": result.get("draft_message", "Hey there, checking in. How are you doing this week?"),
@@ -99,12 +158,14 @@ def recommend(payload: RecommendRequest) -> Dict[str, Any]:
 
 
 @app.post("/v1/process-contact", response_model=ProcessContactResponse)
-def process_contact(payload: ProcessContactRequest) -> ProcessContactResponse:
-    ingest(IngestRequest(events=payload.events))
+async def process_contact(payload: ProcessContactRequest, request: Request) -> ProcessContactResponse:
+    await _ingest_events(payload.events)
+    # Sort and encode once; decay training, scoring and the flow's recent window all reuse it.
+    prepared = prepare_events(payload.events)
 
     base_lambda = payload.lambda_decay_override if payload.lambda_decay_override is not None else 0.08
     lambda_used = (
-        train_temporal_decay(payload.events, base_lambda=base_lambda)
+        train_temporal_decay(prepared, base_lambda=base_lambda)
         if payload.temporal_training_enabled
         else base_lambda
     )
@@ -114,7 +175,7 @@ def process_contact(payload: ProcessContactRequest) -> ProcessContactResponse:
     )
 
     final_score = compute_relationship_score(
-        events=payload.events,
+        events=prepared,
         previous_score=payload.previous_score,
         hp=hp,
     )
@@ -127,9 +188,9 @@ def process_contact(payload: ProcessContactRequest) -> ProcessContactResponse:
         "previous_score": payload.previous_score,
         "recent_event_count_7d": payload.recent_event_count_7d,
         "prior_event_count_7d": payload.prior_event_count_7d,
-        "recent_metadata": [event.model_dump(mode="json") for event in payload.events[-10:]],
+        "recent_metadata": [_event_to_flow_dict(event) for event in prepared.events[-10:]],
     }
-    outcome = flow.run(flow_state)
+    outcome = await _run_flow(request, flow_state)
     anomaly_detected = bool(outcome.get("anomaly_detected", False))
 
     return ProcessContactResponse(
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Literal
+from functools import cached_property
+from typing import Any, Dict, Iterable, List, Literal, Mapping, get_args
 
-from pydantic import BaseModel, Field, model_validator
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 InteractionType = Literal[
@@ -14,8 +17,22 @@ InteractionType = Literal[
     "missed_call",
 ]
 
+KNOWN_INTENTS = ("support", "check_in", "plan_event", "small_talk", "follow_up", "request_help")
+
+# Small-int encodings used by the scoring lookup tables. Intent is free-form, so
+# anything outside KNOWN_INTENTS shares the trailing UNKNOWN_INTENT_CODE.
+INTERACTION_CODES = {name: idx for idx, name in enumerate(get_args(InteractionType))}
+INTENT_CODES = {name: idx for idx, name in enumerate(KNOWN_INTENTS)}
+UNKNOWN_INTENT_CODE = len(KNOWN_INTENTS)
+# MetadataEvent cached_property names, cleared when a copy changes the fields they derive from.
+_DERIVED_EVENT_FIELDS = ("ts_epoch", "interaction_code", "intent_code")
+
 
 class MetadataEvent(BaseModel):
+    # Frozen because ts_epoch/interaction_code/intent_code are cached from the fields below;
+    # build a changed event with model_copy(update=...), which drops the cached values.
+    model_config = ConfigDict(frozen=True)
+
     event_id: str
     contact_hash: str
     ts: datetime
@@ -33,6 +50,58 @@ class MetadataEvent(BaseModel):
             raise ValueError(f"Forbidden raw-text keys in metadata: {sorted(present)}")
         return self
 
+    # Parse-derived scalars for scoring. cached_property rather than validator-populated
+    # private attrs, so instances built with model_construct() still get them.
+    @cached_property
+    def ts_epoch(self) -> float:
+        return self.ts.timestamp()
+
+    @cached_property
+    def interaction_code(self) -> int:
+        return INTERACTION_CODES[self.interaction_type]
+
+    @cached_property
+    def intent_code(self) -> int:
+        return INTENT_CODES.get(self.intent, UNKNOWN_INTENT_CODE)
+
+    def model_copy(self, *, update: Mapping[str, Any] | None = None, deep: bool = False) -> "MetadataEvent":
+        copied = super().model_copy(update=update, deep=deep)
+        if update:
+            # The copy inherited this instance's __dict__, cached values included.
+            for name in _DERIVED_EVENT_FIELDS:
+                copied.__dict__.pop(name, None)
+        return copied
+
+
+@dataclass(slots=True, frozen=True)
+class EventBatch:
+    """Column-oriented view of events in chronological order (stable on ties).
+
+    Scoring kernels read the contiguous columns; ``events`` keeps the sorted models for
+    callers that still need the full records.
+    """
+
+    events: List[MetadataEvent]
+    ts_epoch: np.ndarray
+    interaction_codes: np.ndarray
+    intent_codes: np.ndarray
+    sentiments: np.ndarray
+
+    @classmethod
+    def from_events(cls, events: Iterable[MetadataEvent]) -> "EventBatch":
+        event_list = list(events)
+        count = len(event_list)
+        ts_epoch = np.fromiter((e.ts_epoch for e in event_list), dtype=np.float64, count=count)
+        order = np.argsort(ts_epoch, kind="stable")
+        event_list = [event_list[i] for i in order.tolist()]
+        return cls(
+            events=event_list,
+            ts_epoch=ts_epoch[order],
+            interaction_codes=np.fromiter((e.interaction_code for e in event_list), dtype=np.int8, count=count),
+            intent_codes=np.fromiter((e.intent_code for e in event_list), dtype=np.int8, count=count),
+            sentiments=np.fromiter((e.sentiment for e in event_list), dtype=np.float64, count=count),
+        )
+
 
 class IngestRequest(BaseModel):
     events: List[MetadataEvent]
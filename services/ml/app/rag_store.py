@@ -1,19 +1,28 @@
 from __future__ import annotations
 
-import json
+import hashlib
+import os
 import sqlite3
-from dataclasses import dataclass
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Sequence
 
 import numpy as np
+import orjson
 
 try:
     import faiss  # type: ignore
 except Exception:  # pragma: no cover
     faiss = None
 
+# Shards above this many vectors move from exhaustive search to an HNSW graph.
+HNSW_PROMOTION_THRESHOLD = 50_000
+HNSW_M = 32
+HNSW_EF_SEARCH = 64
+
 
 @dataclass
 class RagResult:
@@ -25,73 +34,226 @@ class RagResult:
     score: float
 
 
+@dataclass
+class _Shard:
+    """Vectors for a single contact; ids[i] is the rag_chunks row id of vector i."""
+
+    # Shared stem of the shard's files; see _file() for the suffixes.
+    path: Path
+    ids: List[int] = field(default_factory=list)
+    index: Any = None
+    # Fallback storage without faiss: unit-normalized float16 rows in a memory-mapped file,
+    # widened to float32 only for the dot product. Capacity doubles when full, so only the
+    # first len(ids) rows are live; the .mmap.json sidecar records rows/dim/capacity.
+    matrix: np.ndarray | None = None
+    # Guards index/matrix/ids; held across add + persist and across search.
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def _file(self, suffix: str) -> Path:
+        return self.path.with_name(self.path.name + suffix)
+
+    @classmethod
+    def load(cls, path: Path) -> "_Shard":
+        shard = cls(path)
+        ids_path = shard._file(".ids.json")
+        ids = orjson.loads(ids_path.read_bytes()) if ids_path.exists() else []
+
+        if faiss is not None and shard._file(".faiss").exists():
+            shard.index = faiss.read_index(str(shard._file(".faiss")))
+            shard.ids = ids
+        elif shard._file(".mmap.json").exists():
+            meta = orjson.loads(shard._file(".mmap.json").read_bytes())
+            matrix = np.memmap(
+                shard._file(".f16"), dtype=np.float16, mode="r+", shape=(meta["capacity"], meta["dim"])
+            )
+            rows = min(meta["rows"], len(ids))
+            if faiss is None:
+                shard.matrix, shard.ids = matrix, ids[:rows]
+            else:
+                shard.add(np.asarray(matrix[:rows], dtype=np.float32), ids[:rows])
+        elif shard._file(".npy").exists():
+            shard.add(np.load(shard._file(".npy")).astype(np.float32), ids)
+        return shard
+
+    def add(self, mat: np.ndarray, row_ids: List[int]) -> None:
+        if faiss is not None:
+            if self.index is None:
+                # fp16 scalar-quantized storage: half the bytes of IndexFlatIP, same inner-product search.
+                self.index = faiss.IndexScalarQuantizer(
+                    mat.shape[1], faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT
+                )
+            self.index.add(mat)
+            if self.index.ntotal > HNSW_PROMOTION_THRESHOLD and not isinstance(self.index, faiss.IndexHNSW):
+                self._promote_to_hnsw()
+        else:
+            n = len(self.ids)
+            if self.matrix is None or self.matrix.shape[0] < n + mat.shape[0]:
+                self._grow(max(2 * n, n + mat.shape[0], 64), mat.shape[1])
+            self.matrix[n : n + mat.shape[0]] = mat
+        self.ids.extend(row_ids)
+
+    def _promote_to_hnsw(self) -> None:
+        # Same fp16 storage and inner-product metric, but sub-linear search; recall is tuned by efSearch.
+        hnsw = faiss.IndexHNSWSQ(
+            self.index.d, faiss.ScalarQuantizer.QT_fp16, HNSW_M, faiss.METRIC_INNER_PRODUCT
+        )
+        hnsw.hnsw.efSearch = HNSW_EF_SEARCH
+        hnsw.add(self.index.reconstruct_n(0, self.index.ntotal))
+        self.index = hnsw
+
+    def _grow(self, capacity: int, dim: int) -> None:
+        # Build the bigger map beside the live one and swap it in; a crash mid-copy keeps the old file.
+        tmp_path = self._file(".f16.tmp")
+        grown = np.memmap(tmp_path, dtype=np.float16, mode="w+", shape=(capacity, dim))
+        if self.matrix is not None:
+            n = len(self.ids)
+            grown[:n] = self.matrix[:n]
+        grown.flush()
+        os.replace(tmp_path, self._file(".f16"))
+        self.matrix = grown
+
+    def persist(self) -> None:
+        self._file(".ids.json").write_bytes(orjson.dumps(self.ids))
+
+        if self.index is not None:
+            faiss.write_index(self.index, str(self._file(".faiss")))
+            return
+
+        # Appends already landed in the mapping; flush writes back only the dirty pages.
+        self.matrix.flush()
+        meta = {"rows": len(self.ids), "dim": self.matrix.shape[1], "capacity": self.matrix.shape[0]}
+        self._file(".mmap.json").write_bytes(orjson.dumps(meta))
+
+    def search(self, query: np.ndarray, k: int) -> List[tuple[int, float]]:
+        limit = min(k, len(self.ids))
+        if limit == 0:
+            return []
+
+        if self.index is not None:
+            scores, idxs = self.index.search(query, limit)
+            return [
+                (self.ids[idx], float(score))
+                for score, idx in zip(scores[0].tolist(), idxs[0].tolist())
+                if idx >= 0
+            ]
+
+        sims = np.dot(self.matrix[: len(self.ids)].astype(np.float32), query[0])
+        order = np.argsort(-sims)[:limit]
+        return [(self.ids[idx], float(sims[idx])) for idx in order.tolist()]
+
+
 class RagStore:
     def __init__(self, data_dir: Path):
         self.db_path = data_dir / "rag.sqlite"
-        self.index_path = data_dir / "rag.index"
-        self.id_map_path = data_dir / "rag.index.ids.json"
-        self.fallback_matrix_path = data_dir / "rag.matrix.npy"
+        # One index (or fallback matrix) per contact, so a query only scans that contact's vectors.
+        self.shard_dir = data_dir / "indexes"
+        self.manifest_path = self.shard_dir / "manifest.json"
+        # Single-index layout from before sharding; migrated into shards on first load.
+        self.legacy_index_path = data_dir / "rag.index"
+        self.legacy_id_map_path = data_dir / "rag.index.ids.json"
+        self.legacy_matrix_path = data_dir / "rag.matrix.npy"
+
+        # contact_hash -> shard file stem; shards themselves are loaded on first use.
+        self._manifest: Dict[str, str] = {}
+        self._shards: Dict[str, _Shard] = {}
+        # Bumped on every write for a contact so callers can key caches on it.
+        self._contact_versions: Dict[str, int] = {}
 
-        self._index = None
-        self._id_map: List[int] = []
-        self._matrix = np.zeros((0, 384), dtype=np.float32)
+        # One connection for the store's lifetime, shared across threadpool workers under _lock,
+        # which also guards the manifest, shard table and versions. Vector search and writes only
+        # take the per-shard lock, so one contact's ingest doesn't stall another contact's query.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
 
         self._init_db()
         self._load_state()
 
-    def _connect(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    def contact_version(self, contact_hash: str) -> int:
+        return self._contact_versions.get(contact_hash, 0)
 
     def _init_db(self) -> None:
-        with self._connect() as conn:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS rag_chunks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    event_id TEXT NOT NULL,
-                    contact_hash TEXT NOT NULL,
-                    summary TEXT NOT NULL,
-                    metadata_json TEXT NOT NULL,
-                    created_at TEXT NOT NULL
-                )
-                """
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rag_chunks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_id TEXT NOT NULL,
+                contact_hash TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                metadata_json TEXT NOT NULL,
+                created_at TEXT NOT NULL
             )
-            conn.commit()
+            """
+        )
 
     def _load_state(self) -> None:
-        if self.id_map_path.exists():
-            self._id_map = json.loads(self.id_map_path.read_text(encoding="utf-8"))
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        if self.manifest_path.exists():
+            self._manifest = orjson.loads(self.manifest_path.read_bytes())
+        elif self.legacy_id_map_path.exists():
+            self._migrate_legacy()
 
-        if faiss is not None and self.index_path.exists():
-            self._index = faiss.read_index(str(self.index_path))
+    def _migrate_legacy(self) -> None:
+        id_map: List[int] = orjson.loads(self.legacy_id_map_path.read_bytes())
+        if faiss is not None and self.legacy_index_path.exists():
+            index = faiss.read_index(str(self.legacy_index_path))
+            vectors = index.reconstruct_n(0, index.ntotal)
+        elif self.legacy_matrix_path.exists():
+            vectors = np.load(self.legacy_matrix_path).astype(np.float32)
+        else:
             return
 
-        if self.fallback_matrix_path.exists():
-            self._matrix = np.load(self.fallback_matrix_path)
+        placeholders = ",".join("?" * len(id_map))
+        contact_by_id = {
+            row["id"]: row["contact_hash"]
+            for row in self._conn.execute(
+                f"SELECT id, contact_hash FROM rag_chunks WHERE id IN ({placeholders})", id_map
+            )
+        }
+        positions: Dict[str, List[int]] = defaultdict(list)
+        for pos, row_id in enumerate(id_map[: len(vectors)]):
+            if row_id in contact_by_id:
+                positions[contact_by_id[row_id]].append(pos)
 
-    def _persist_state(self) -> None:
-        self.id_map_path.write_text(json.dumps(self._id_map), encoding="utf-8")
+        for contact_hash, rows in positions.items():
+            shard = self._shard(contact_hash, create=True)
+            shard.add(vectors[rows], [id_map[pos] for pos in rows])
+            shard.persist()
+        self._persist_manifest()
 
-        if faiss is not None and self._index is not None:
-            faiss.write_index(self._index, str(self.index_path))
-            return
+    @staticmethod
+    def _shard_stem(contact_hash: str) -> str:
+        # contact_hash is caller-supplied, so derive a filesystem-safe name from it.
+        return hashlib.blake2b(contact_hash.encode("utf-8"), digest_size=16).hexdigest()
 
-        np.save(self.fallback_matrix_path, self._matrix)
+    def _shard(self, contact_hash: str, create: bool = False) -> _Shard | None:
+        shard = self._shards.get(contact_hash)
+        if shard is not None:
+            return shard
 
-    def _ensure_index(self, dim: int) -> None:
-        if faiss is None:
-            return
-        if self._index is None:
-            self._index = faiss.IndexFlatIP(dim)
+        stem = self._manifest.get(contact_hash)
+        if stem is None:
+            if not create:
+                return None
+            stem = self._manifest[contact_hash] = self._shard_stem(contact_hash)
+            shard = _Shard(self.shard_dir / stem)
+        else:
+            shard = _Shard.load(self.shard_dir / stem)
+        self._shards[contact_hash] = shard
+        return shard
+
+    def _persist_manifest(self) -> None:
+        self.manifest_path.write_bytes(orjson.dumps(self._manifest))
 
     @staticmethod
-    def _normalize(vec: np.ndarray) -> np.ndarray:
-        norm = np.linalg.norm(vec)
-        if norm <= 0:
-            return vec
-        return vec / norm
+    def _normalize_rows(mat: np.ndarray) -> np.ndarray:
+        """L2-normalize a float32 (n, d) matrix in place; all-zero rows are left as-is."""
+        norms = np.linalg.norm(mat, axis=1, keepdims=True)
+        np.divide(mat, norms, out=mat, where=norms > 0)
+        return mat
 
     def add_record(
         self,
@@ -102,74 +264,104 @@ class RagStore:
         metadata: Dict[str, Any],
         embedding: np.ndarray,
     ) -> int:
+        record = {
+            "event_id": event_id,
+            "contact_hash": contact_hash,
+            "summary": summary,
+            "metadata": metadata,
+        }
+        return self.add_records([record], embedding.reshape(1, -1))[0]
+
+    def add_records(self, records: Sequence[Dict[str, Any]], embeddings: np.ndarray) -> List[int]:
+        """Insert records (event_id, contact_hash, summary, metadata) with one row of embeddings each."""
+        if not records:
+            return []
+
         created_at = datetime.now(timezone.utc).isoformat()
-        with self._connect() as conn:
-            cur = conn.execute(
-                """
-                INSERT INTO rag_chunks(event_id, contact_hash, summary, metadata_json, created_at)
-                VALUES(?, ?, ?, ?, ?)
-                """,
-                (event_id, contact_hash, summary, json.dumps(metadata), created_at),
-            )
-            conn.commit()
-            row_id = int(cur.lastrowid)
+        # Metadata is stored as orjson bytes (a BLOB); orjson.loads also reads older TEXT rows.
+        rows = [
+            (r["event_id"], r["contact_hash"], r["summary"], orjson.dumps(r["metadata"]), created_at)
+            for r in records
+        ]
+        mat = self._normalize_rows(np.array(embeddings, dtype=np.float32).reshape(len(records), -1))
 
-        vec = self._normalize(embedding.astype(np.float32))
+        positions: Dict[str, List[int]] = defaultdict(list)
+        for pos, record in enumerate(records):
+            positions[record["contact_hash"]].append(pos)
 
-        if faiss is not None:
-            self._ensure_index(vec.shape[0])
-            self._index.add(vec.reshape(1, -1))
-        else:
-            if self._matrix.size == 0:
-                self._matrix = vec.reshape(1, -1)
-            else:
-                self._matrix = np.vstack([self._matrix, vec.reshape(1, -1)])
+        with self._lock:
+            conn = self._conn
+            # Hold the write lock so the AUTOINCREMENT ids assigned below are exactly those above `base`.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                (base,) = conn.execute("SELECT COALESCE(MAX(id), 0) FROM rag_chunks").fetchone()
+                conn.executemany(
+                    """
+                    INSERT INTO rag_chunks(event_id, contact_hash, summary, metadata_json, created_at)
+                    VALUES(?, ?, ?, ?, ?)
+                    """,
+                    rows,
+                )
+                row_ids = [
+                    int(row[0])
+                    for row in conn.execute("SELECT id FROM rag_chunks WHERE id > ? ORDER BY id", (base,))
+                ]
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+            new_contacts = any(contact_hash not in self._manifest for contact_hash in positions)
+            shards = {contact_hash: self._shard(contact_hash, create=True) for contact_hash in positions}
+            if new_contacts:
+                self._persist_manifest()
+
+        for contact_hash, shard_rows in positions.items():
+            shard = shards[contact_hash]
+            with shard.lock:
+                shard.add(mat[shard_rows], [row_ids[pos] for pos in shard_rows])
+                shard.persist()
 
-        self._id_map.append(row_id)
-        self._persist_state()
-        return row_id
+        with self._lock:
+            for contact_hash in positions:
+                self._contact_versions[contact_hash] = self.contact_version(contact_hash) + 1
+        return row_ids
 
     def query(self, *, contact_hash: str, query_embedding: np.ndarray, k: int = 4) -> List[RagResult]:
-        if not self._id_map:
-            return []
+        query = self._normalize_rows(np.array(query_embedding, dtype=np.float32).reshape(1, -1))
 
-        query = self._normalize(query_embedding.astype(np.float32)).reshape(1, -1)
-        candidate_pairs: List[tuple[int, float]] = []
+        with self._lock:
+            shard = self._shard(contact_hash)
+        if shard is None:
+            return []
+        with shard.lock:
+            candidate_pairs = shard.search(query, k)
+        if not candidate_pairs:
+            return []
 
-        if faiss is not None and self._index is not None and self._index.ntotal > 0:
-            limit = min(max(k * 4, k), len(self._id_map))
-            scores, idxs = self._index.search(query, limit)
-            for score, idx in zip(scores[0].tolist(), idxs[0].tolist()):
-                if idx < 0:
-                    continue
-                candidate_pairs.append((self._id_map[idx], float(score)))
-        else:
-            sims = np.dot(self._matrix, query[0]) if self._matrix.size else np.array([])
-            order = np.argsort(-sims)[: max(k * 4, k)]
-            for idx in order.tolist():
-                candidate_pairs.append((self._id_map[idx], float(sims[idx])))
+        with self._lock:
+            placeholders = ",".join("?" * len(candidate_pairs))
+            rows = self._conn.execute(
+                f"SELECT * FROM rag_chunks WHERE id IN ({placeholders})",
+                [row_id for row_id, _ in candidate_pairs],
+            ).fetchall()
 
+        rows_by_id = {row["id"]: row for row in rows}
         results: List[RagResult] = []
-        with self._connect() as conn:
-            for row_id, score in candidate_pairs:
-                row = conn.execute(
-                    "SELECT * FROM rag_chunks WHERE id = ?",
-                    (row_id,),
-                ).fetchone()
-                if row is None or row["contact_hash"] != contact_hash:
-                    continue
-
-                results.append(
-                    RagResult(
-                        event_id=row["event_id"],
-                        contact_hash=row["contact_hash"],
-                        summary=row["summary"],
-                        metadata=json.loads(row["metadata_json"]),
-                        created_at=row["created_at"],
-                        score=round(score, 4),
-                    )
+        for row_id, score in candidate_pairs:
+            row = rows_by_id.get(row_id)
+            if row is None:
+                continue
+
+            results.append(
+                RagResult(
+                    event_id=row["event_id"],
+                    contact_hash=row["contact_hash"],
+                    summary=row["summary"],
+                    metadata=orjson.loads(row["metadata_json"]),
+                    created_at=row["created_at"],
+                    score=round(score, 4),
                 )
-                if len(results) >= k:
-                    break
+            )
 
         return results
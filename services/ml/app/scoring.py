@@ -3,14 +3,23 @@ from __future__ import annotations
 import math
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Iterable, Literal
+from typing import Iterable, Literal, Tuple
 
-from .models import MetadataEvent
+import numpy as np
+
+from .models import INTERACTION_CODES, KNOWN_INTENTS, EventBatch, MetadataEvent
+
+try:
+    from numba import njit
+
+    _NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - numba is an optional accelerator
+    _NUMBA_AVAILABLE = False
 
 Band = Literal["good", "fading", "critical"]
 
 
-@dataclass(frozen=True)
+@dataclass(slots=True, frozen=True)
 class ScoringHyperParams:
     lambda_decay: float = 0.08
     recency_gamma: float = 0.05
@@ -20,6 +29,9 @@ class ScoringHyperParams:
     max_score: float = 100.0
 
 
+_DEFAULT_HP = ScoringHyperParams()
+
+
 INTERACTION_WEIGHTS = {
     "call": 8.0,
     "text": 4.0,
@@ -37,6 +49,15 @@ INTENT_WEIGHTS = {
     "request_help": 1.0,
 }
 
+DEFAULT_INTENT_WEIGHT = 0.5
+
+# Dense lookup tables indexed by MetadataEvent.interaction_code / intent_code;
+# the trailing W_INTENT row is the default for intents outside KNOWN_INTENTS.
+W_INTERACTION = np.array([INTERACTION_WEIGHTS[name] for name in INTERACTION_CODES], dtype=np.float64)
+W_INTENT = np.array(
+    [*(INTENT_WEIGHTS[name] for name in KNOWN_INTENTS), DEFAULT_INTENT_WEIGHT], dtype=np.float64
+)
+
 
 
 def clamp_score(value: float, low: float = 0.0, high: float = 100.0) -> float:
@@ -44,111 +65,175 @@ def clamp_score(value: float, low: float = 0.0, high: float = 100.0) -> float:
 
 
 
+# Thresholds are whole numbers, so int(score) picks the same bucket as the comparisons
+# for any score in [0, 100]; out-of-range scores are clamped to the end entries.
+_BAND_LUT: Tuple[Band, ...] = tuple(
+    "good" if i >= 75 else "fading" if i >= 45 else "critical" for i in range(101)
+)
+_RISK_LUT: Tuple[Tuple[Literal["low", "medium", "high"], ...], ...] = (
+    tuple("high" if i < 45 else "medium" if i < 70 else "low" for i in range(101)),
+    ("high",) * 101,
+)
+
+
 def band_for_score(score: float) -> Band:
-    if score >= 75:
-        return "good"
-    if score >= 45:
-        return "fading"
-    return "critical"
+    return _BAND_LUT[min(100, max(0, int(score)))]
 
 
 def risk_level_for_score(score: float, anomaly_detected: bool = False) -> Literal["low", "medium", "high"]:
-    if anomaly_detected or score < 45:
-        return "high"
-    if score < 70:
-        return "medium"
-    return "low"
+    return _RISK_LUT[bool(anomaly_detected)][min(100, max(0, int(score)))]
 
 
 
-def _days_between(a: datetime, b: datetime) -> float:
-    return max((a - b).total_seconds() / 86400.0, 0.0)
+def _gap_stats(ts: np.ndarray) -> Tuple[float, float]:
+    """Mean and spread (max - min) of the day gaps between sorted epoch seconds."""
+    gaps = np.diff(ts) / 86400.0
+    return gaps.mean(), np.ptp(gaps)
 
 
-
-def interaction_impact(
-    event: MetadataEvent,
-    reference_time: datetime,
-    hp: ScoringHyperParams,
-) -> float:
-    base_weight = INTERACTION_WEIGHTS[event.interaction_type]
-    intent_weight = INTENT_WEIGHTS.get(event.intent, 0.5)
-    sentiment_term = hp.sentiment_weight * float(event.sentiment)
-
-    days_old = _days_between(reference_time, event.ts)
-    recency_multiplier = math.exp(-hp.recency_gamma * days_old)
-
-    return (
-        (base_weight + intent_weight + sentiment_term)
-        * hp.interaction_multiplier
-        * recency_multiplier
-    )
+_gap_stats_kernel = _gap_stats
+if _NUMBA_AVAILABLE:
+    try:
+        _gap_stats_kernel = njit("UniTuple(float64, 2)(float64[::1])", cache=True)(_gap_stats)
+    except Exception:  # pragma: no cover - keep serving on the NumPy path
+        pass
 
 
 def train_temporal_decay(
-    events: Iterable[MetadataEvent],
+    events: Iterable[MetadataEvent] | EventBatch,
     base_lambda: float = 0.08,
 ) -> float:
-    event_list = sorted(list(events), key=lambda e: e.ts)
-    if len(event_list) < 2:
+    ts = prepare_events(events).ts_epoch
+    if ts.shape[0] < 2:
         return round(base_lambda, 4)
 
-    gaps = []
-    for i in range(1, len(event_list)):
-        gap_days = _days_between(event_list[i].ts, event_list[i - 1].ts)
-        gaps.append(gap_days)
-
-    avg_gap = sum(gaps) / max(len(gaps), 1)
-    variability = (max(gaps) - min(gaps)) if gaps else 0.0
+    avg_gap, variability = _gap_stats_kernel(ts)
 
     # Higher gap/variability => slightly faster decay. Denser cadence => slower decay.
     trained = base_lambda + (0.01 * min(avg_gap, 7.0)) + (0.003 * min(variability, 7.0))
-    trained = max(0.03, min(0.2, trained))
-    return round(trained, 4)
+    return round(float(np.clip(trained, 0.03, 0.2)), 4)
+
+
+def prepare_events(events: Iterable[MetadataEvent] | EventBatch) -> EventBatch:
+    """Sort and encode events once so several scoring passes can share the result."""
+    if isinstance(events, EventBatch):
+        return events
+    return EventBatch.from_events(events)
+
+
+def _score_numpy(
+    ts: np.ndarray,
+    it_idx: np.ndarray,
+    intent_idx: np.ndarray,
+    sent: np.ndarray,
+    previous_score: float,
+    now_s: float,
+    lam: float,
+    gamma: float,
+    sw: float,
+    mult: float,
+    lo: float,
+    hi: float,
+) -> float:
+    # Row 0: step gap since the previous event; row 1: age relative to now. Both decays
+    # come out of one (2, n) buffer and a single in-place np.exp.
+    exps = np.empty((2, ts.shape[0]), dtype=np.float64)
+    exps[0, 0] = 0.0
+    np.subtract(ts[1:], ts[:-1], out=exps[0, 1:])
+    np.subtract(now_s, ts, out=exps[1])
+    exps /= 86400.0
+    np.maximum(exps, 0.0, out=exps)
+    exps *= np.array([[-lam], [-gamma]])
+    np.exp(exps, out=exps)
+    decays, recency = exps
+    impacts = (W_INTERACTION[it_idx] + W_INTENT[intent_idx] + sw * sent) * mult * recency
+
+    # Every step clamps to [lo, hi], which breaks the closed-form cumprod
+    # solution of the linear recurrence, so the fold itself stays sequential.
+    score = clamp_score(previous_score, lo, hi)
+    for decay, impact in zip(decays.tolist(), impacts.tolist()):
+        # Inline clamp: two compares instead of a call plus builtin min/max per step.
+        score = score * decay + impact
+        score = lo if score < lo else hi if score > hi else score
+
+    tail_days = max((now_s - ts[-1]) / 86400.0, 0.0)
+    return clamp_score(score * math.exp(-lam * tail_days), lo, hi)
+
+
+def _score_loop(
+    ts: np.ndarray,
+    it_idx: np.ndarray,
+    intent_idx: np.ndarray,
+    sent: np.ndarray,
+    previous_score: float,
+    now_s: float,
+    lam: float,
+    gamma: float,
+    sw: float,
+    mult: float,
+    lo: float,
+    hi: float,
+) -> float:
+    """Scalar form of _score_numpy, written for numba (W_* tables are frozen as constants)."""
+    score = max(lo, min(hi, previous_score))
+    prev_ts = ts[0]
+    for i in range(ts.shape[0]):
+        dt_days = max((ts[i] - prev_ts) / 86400.0, 0.0)
+        days_old = max((now_s - ts[i]) / 86400.0, 0.0)
+        impact = (
+            (W_INTERACTION[it_idx[i]] + W_INTENT[intent_idx[i]] + sw * sent[i])
+            * mult
+            * math.exp(-gamma * days_old)
+        )
+        score = score * math.exp(-lam * dt_days) + impact
+        score = lo if score < lo else hi if score > hi else score
+        prev_ts = ts[i]
 
+    tail_days = max((now_s - prev_ts) / 86400.0, 0.0)
+    return max(lo, min(hi, score * math.exp(-lam * tail_days)))
 
 
-def update_score(
-    old_score: float,
-    event: MetadataEvent,
-    delta_t_days: float,
-    reference_time: datetime,
-    hp: ScoringHyperParams,
-) -> float:
-    decayed = old_score * math.exp(-hp.lambda_decay * max(delta_t_days, 0.0))
-    impact = interaction_impact(event=event, reference_time=reference_time, hp=hp)
-    return clamp_score(decayed + impact, hp.min_score, hp.max_score)
+# The EventBatch column dtypes. An explicit signature makes numba compile eagerly at import
+# (or load the cached machine code), and the image build primes that cache, so no request
+# pays for a JIT compile.
+_SCORE_SIGNATURE = (
+    "float64(float64[::1], int8[::1], int8[::1], float64[::1], "
+    "float64, float64, float64, float64, float64, float64, float64, float64)"
+)
 
+_score_kernel = _score_numpy
+if _NUMBA_AVAILABLE:
+    try:
+        _score_kernel = njit(_SCORE_SIGNATURE, cache=True, fastmath=True)(_score_loop)
+    except Exception:  # pragma: no cover - keep serving on the NumPy path
+        _NUMBA_AVAILABLE = False
 
 
 def compute_relationship_score(
-    events: Iterable[MetadataEvent],
+    events: Iterable[MetadataEvent] | EventBatch,
     previous_score: float = 50.0,
     as_of: datetime | None = None,
     hp: ScoringHyperParams | None = None,
 ) -> float:
-    hp = hp or ScoringHyperParams()
-    event_list = sorted(list(events), key=lambda e: e.ts)
+    hp = hp or _DEFAULT_HP
+    prepared = prepare_events(events)
 
-    if not event_list:
+    if not prepared.events:
         return round(clamp_score(previous_score, hp.min_score, hp.max_score), 2)
 
-    now = as_of or datetime.now(timezone.utc)
-    score = clamp_score(previous_score, hp.min_score, hp.max_score)
-
-    prev_ts = event_list[0].ts
-    for event in event_list:
-        delta_t_days = _days_between(event.ts, prev_ts)
-        score = update_score(
-            old_score=score,
-            event=event,
-            delta_t_days=delta_t_days,
-            reference_time=now,
-            hp=hp,
-        )
-        prev_ts = event.ts
-
-    tail_days = _days_between(now, prev_ts)
-    score = score * math.exp(-hp.lambda_decay * tail_days)
-
-    return round(clamp_score(score, hp.min_score, hp.max_score), 2)
+    now_s = (as_of or datetime.now(timezone.utc)).timestamp()
+    score = _score_kernel(
+        prepared.ts_epoch,
+        prepared.interaction_codes,
+        prepared.intent_codes,
+        prepared.sentiments,
+        float(previous_score),
+        now_s,
+        hp.lambda_decay,
+        hp.recency_gamma,
+        hp.sentiment_weight,
+        hp.interaction_multiplier,
+        hp.min_score,
+        hp.max_score,
+    )
+    return round(score, 2)
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from cachetools import TTLCache
+
+from .langgraph_flow import ANOMALY_SCORE_DROP
+from .scoring import band_for_score
+
+FlowKey = Tuple[Any, ...]
+
+
+class SemanticCache:
+    """Short-lived cache of RelationshipFlow outputs for near-identical requests.
+
+    Adjacent requests for a contact often differ only by score noise, so the key keeps the
+    contact, alias and event counts exactly, rounds scores to one decimal, and identifies the
+    recent events by a 64-bit blake2b digest of their last 10 event ids. The score band and the
+    score-drop anomaly flag are keyed exactly, so rounding never merges states on opposite sides
+    of a planner or anomaly threshold. Cached values must not contain wall-clock fields such as
+    schedule_at; callers recompute those on every hit.
+    """
+
+    def __init__(self, maxsize: int = 2048, ttl: float = 60.0):
+        self._entries: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def key_for(state: Dict[str, Any]) -> FlowKey:
+        recent = state.get("recent_metadata", [])[-10:]
+        event_ids = "\x00".join(str(item.get("event_id", "")) for item in recent)
+        current_score = float(state.get("current_score", 0.0))
+        previous_score = state.get("previous_score")
+        score_drop = previous_score is not None and (
+            float(previous_score) - current_score >= ANOMALY_SCORE_DROP
+        )
+        return (
+            state.get("contact_hash"),
+            # The planner writes the alias into its draft message, so it has to stay in the key.
+            state.get("alias"),
+            band_for_score(current_score),
+            score_drop,
+            round(current_score, 1),
+            None if previous_score is None else round(float(previous_score), 1),
+            state.get("recent_event_count_7d"),
+            state.get("prior_event_count_7d"),
+            hashlib.blake2b(event_ids.encode("utf-8"), digest_size=8).digest(),
+        )
+
+    async def get_or_compute(
+        self,
+        key: FlowKey,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        cached = self._entries.get(key)
+        if cached is not None:
+            return cached
+
+        value = await compute()
+        self._entries[key] = value
+        return value
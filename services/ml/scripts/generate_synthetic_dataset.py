@@ -5,11 +5,13 @@ from __future__ import annotations
 
 import argparse
 import hashlib
-import json
-import random
-from datetime import datetime, timedelta, timezone
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
 
+import numpy as np
+import orjson
+
 CONTACTS = ["Alex", "Maya", "Jordan", "Priya", "Sam"]
 INTERACTIONS = ["text", "call", "ignored_message", "auto_nudge", "missed_call"]
 INTENTS = ["check_in", "support", "plan_event", "small_talk", "follow_up"]
@@ -24,11 +26,59 @@ SUMMARY_TEMPLATES = {
 
 
 def hash_contact(name: str) -> str:
-    return hashlib.sha256(name.encode("utf-8")).hexdigest()[:16]
+    # Must stay in sync with hashAlias in services/api/src/utils/hash.ts (first 8 bytes of SHA-256).
+    return hashlib.sha256(name.encode("utf-8")).digest()[:8].hex()
+
+
+# Per-index lookups parallel to the integer codes drawn in generate().
+CONTACT_HASHES = tuple(hash_contact(name) for name in CONTACTS)
+EVENT_ID_PREFIXES = tuple(f"evt_{contact_hash}_" for contact_hash in CONTACT_HASHES)
+SUMMARY_BY_IDX = tuple(SUMMARY_TEMPLATES[name] for name in INTERACTIONS)
+INTERACTION_TUPLE = tuple(INTERACTIONS)
+INTENT_TUPLE = tuple(INTENTS)
+# Sentiment is uniform on [low, low + span) per interaction, indexed by interaction code.
+SENTIMENT_RANGES = {
+    "text": (-0.2, 1.2),
+    "call": (-0.2, 1.2),
+    "ignored_message": (-1.0, 0.8),
+    "auto_nudge": (-0.6, 1.0),
+    "missed_call": (-0.6, 1.0),
+}
+SENTIMENT_LOW, SENTIMENT_SPAN = np.array([SENTIMENT_RANGES[name] for name in INTERACTIONS]).T
+# Identical for every event, so all events share one dict; treat it as read-only.
+EVENT_METADATA = {"channel": "mobile", "source": "synthetic_generator"}
+
+
+class AliasTable:
+    """Vose alias table: O(1) weighted draws, two uniform variates per sample."""
+
+    def __init__(self, weights: list[float]):
+        k = len(weights)
+        scaled = np.asarray(weights, dtype=np.float64) * (k / sum(weights))
+        self.prob = np.ones(k)
+        self.alias = np.arange(k)
+
+        small = [i for i in range(k) if scaled[i] < 1.0]
+        large = [i for i in range(k) if scaled[i] >= 1.0]
+        while small and large:
+            lo, hi = small.pop(), large.pop()
+            self.prob[lo] = scaled[lo]
+            self.alias[lo] = hi
+            scaled[hi] -= 1.0 - scaled[lo]
+            (small if scaled[hi] < 1.0 else large).append(hi)
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        idx = rng.integers(0, self.prob.shape[0], size=size)
+        return np.where(rng.random(size) < self.prob[idx], idx, self.alias[idx])
+
+
+EVENTS_PER_SLOT = AliasTable([0.2, 0.45, 0.25, 0.1])
+INTERACTION_SAMPLER = AliasTable([0.5, 0.22, 0.12, 0.1, 0.06])
 
 
 
 DEFAULT_START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+DAYS_PER_CHUNK = 30
 
 
 def parse_start(start_date: str | None) -> datetime:
@@ -41,49 +91,76 @@ def parse_start(start_date: str | None) -> datetime:
     return parsed.astimezone(timezone.utc)
 
 
-def generate(days: int, seed: int, start_date: datetime):
-    random.seed(seed)
+def _generate_chunk(seed_seq: np.random.SeedSequence, first_day: int, days: int) -> tuple[np.ndarray, ...]:
+    """Draw the random columns for days [first_day, first_day + days); depends only on its seed."""
+    rng = np.random.default_rng(seed_seq)
+
+    # One (day, contact) slot per count.
+    counts = EVENTS_PER_SLOT.sample(rng, days * len(CONTACTS))
+    total = int(counts.sum())
+    offsets, contact_idx = np.divmod(np.repeat(np.arange(counts.shape[0]), counts), len(CONTACTS))
+    slot_idx = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    interactions = INTERACTION_SAMPLER.sample(rng, total)
+    seconds = rng.integers(0, 86400, size=total)
+    intents = rng.integers(0, len(INTENTS), size=total)
+
+    sentiment = SENTIMENT_LOW[interactions] + SENTIMENT_SPAN[interactions] * rng.random(total)
+
+    return contact_idx, offsets + first_day, slot_idx, interactions, seconds, intents, np.round(sentiment, 3)
+
+
+def generate(days: int, seed: int, start_date: datetime, workers: int = 1):
     start = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
 
-    contacts = [{"alias": name, "contact_hash": hash_contact(name)} for name in CONTACTS]
-    events = []
-
-    for offset in range(days):
-        day = start + timedelta(days=offset)
-        for contact in contacts:
-            count = random.choices([0, 1, 2, 3], weights=[0.2, 0.45, 0.25, 0.1], k=1)[0]
-            for i in range(count):
-                interaction = random.choices(
-                    INTERACTIONS,
-                    weights=[0.5, 0.22, 0.12, 0.1, 0.06],
-                    k=1,
-                )[0]
-                ts = day + timedelta(seconds=random.randint(0, 86399))
-
-                if interaction in {"call", "text"}:
-                    sentiment = round(random.uniform(-0.2, 1.0), 3)
-                elif interaction == "ignored_message":
-                    sentiment = round(random.uniform(-1.0, -0.2), 3)
-                else:
-                    sentiment = round(random.uniform(-0.6, 0.4), 3)
-
-                event = {
-                    "event_id": f"evt_{contact['contact_hash']}_{offset}_{i}",
-                    "contact_hash": contact["contact_hash"],
-                    "ts": ts.isoformat(),
-                    "interaction_type": interaction,
-                    "sentiment": sentiment,
-                    "intent": random.choice(INTENTS),
-                    # Abstractive, privacy-safe summary. No raw transcript text included.
-                    "summary": SUMMARY_TEMPLATES[interaction],
-                    "metadata": {
-                        "channel": "mobile",
-                        "source": "synthetic_generator",
-                    },
-                }
-                events.append(event)
-
-    events.sort(key=lambda item: item["ts"])
+    contacts = [
+        {"alias": name, "contact_hash": contact_hash} for name, contact_hash in zip(CONTACTS, CONTACT_HASHES)
+    ]
+
+    # Fixed-size day chunks with spawned child seeds, so the output depends on seed and days
+    # but not on how many workers drew the chunks.
+    first_days = list(range(0, days, DAYS_PER_CHUNK)) or [0]
+    seed_seqs = np.random.SeedSequence(seed).spawn(len(first_days))
+    chunk_days = [max(0, min(DAYS_PER_CHUNK, days - first_day)) for first_day in first_days]
+    if workers > 1 and len(first_days) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_generate_chunk, seed_seqs, first_days, chunk_days))
+    else:
+        chunks = list(map(_generate_chunk, seed_seqs, first_days, chunk_days))
+
+    contact_idx, offsets, slot_idx, interactions, seconds, intents, sentiment = (
+        np.concatenate(column) for column in zip(*chunks)
+    )
+
+    # Epoch-second timestamps, formatted in one vectorized pass as UTC ISO-8601 strings.
+    ts_epoch = int(start.timestamp()) + offsets * 86400 + seconds
+    ts_strings = np.char.add(ts_epoch.astype("datetime64[s]").astype(str), "+00:00")
+
+    # Emit in timestamp order; the stable sort keeps generation order for equal seconds.
+    order = np.argsort(ts_epoch, kind="stable")
+    events = [
+        {
+            "event_id": EVENT_ID_PREFIXES[c] + f"{offset}_{i}",
+            "contact_hash": CONTACT_HASHES[c],
+            "ts": ts,
+            "interaction_type": INTERACTION_TUPLE[interaction],
+            "sentiment": score,
+            "intent": INTENT_TUPLE[intent],
+            # Abstractive, privacy-safe summary. No raw transcript text included.
+            "summary": SUMMARY_BY_IDX[interaction],
+            "metadata": EVENT_METADATA,
+        }
+        for c, offset, i, interaction, ts, score, intent in zip(
+            contact_idx[order].tolist(),
+            offsets[order].tolist(),
+            slot_idx[order].tolist(),
+            interactions[order].tolist(),
+            ts_strings[order].tolist(),
+            sentiment[order].tolist(),
+            intents[order].tolist(),
+        )
+    ]
+
     return {"contacts": contacts, "events": events}
 
 
@@ -92,6 +169,12 @@ def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--days", type=int, default=30)
     parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes used to draw day chunks; output is identical for any value.",
+    )
     parser.add_argument(
         "--start-date",
         type=str,
@@ -109,9 +192,10 @@ def main() -> None:
         days=args.days,
         seed=args.seed,
         start_date=parse_start(args.start_date),
+        workers=args.workers,
     )
     args.output.parent.mkdir(parents=True, exist_ok=True)
-    args.output.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    args.output.write_bytes(orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
 
     print(f"Wrote {len(payload['events'])} events to {args.output}")
 
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import orjson
+import pytest
+
+from app import rag_store
+from app.rag_store import RagStore
+
+DIM = 16
+CONTACTS = ("contact_a", "contact_b", "contact_c")
+
+
+@pytest.fixture(params=["faiss", "numpy"])
+def backend(request, monkeypatch) -> str:
+    if request.param == "faiss" and rag_store.faiss is None:
+        pytest.skip("faiss not installed")
+    if request.param == "numpy":
+        monkeypatch.setattr(rag_store, "faiss", None)
+    return request.param
+
+
+def _vectors(n: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(n, DIM)).astype(np.float32)
+
+
+def _records(n: int) -> list[dict]:
+    return [
+        {
+            "event_id": f"evt_{i}",
+            "contact_hash": CONTACTS[i % len(CONTACTS)],
+            "summary": f"Synthetic summary {i}.",
+            "metadata": {"i": i},
+        }
+        for i in range(n)
+    ]
+
+
+def test_query_only_returns_the_queried_contact(backend: str, tmp_path: Path) -> None:
+    vectors = _vectors(30)
+    store = RagStore(tmp_path)
+    store.add_records(_records(30), vectors)
+
+    results = store.query(contact_hash="contact_b", query_embedding=vectors[4], k=5)
+
+    assert len(results) == 5
+    assert {result.contact_hash for result in results} == {"contact_b"}
+    assert results[0].event_id == "evt_4"
+    assert results[0].metadata == {"i": 4}
+    assert store.query(contact_hash="unknown", query_embedding=vectors[4]) == []
+
+
+def test_reopened_store_returns_the_same_ids(backend: str, tmp_path: Path) -> None:
+    vectors = _vectors(30)
+    store = RagStore(tmp_path)
+    store.add_records(_records(30), vectors)
+    store.add_record(
+        event_id="evt_late",
+        contact_hash="contact_a",
+        summary="Added after the batch.",
+        metadata={},
+        embedding=vectors[0] + 1.0,
+    )
+
+    reopened = RagStore(tmp_path)
+    for contact_hash, probe in (("contact_a", 0), ("contact_a", 9), ("contact_c", 2)):
+        query = {"contact_hash": contact_hash, "query_embedding": vectors[probe]}
+        before = [result.event_id for result in store.query(**query)]
+        assert before
+        assert [result.event_id for result in reopened.query(**query)] == before
+
+
+def test_legacy_single_index_migrates_into_shards(backend: str, tmp_path: Path) -> None:
+    # Lay out a pre-sharding store: rows in rag.sqlite, one index over every contact's
+    # vectors, and rag.index.ids.json mapping index positions to row ids.
+    RagStore(tmp_path)._conn.close()
+    records = _records(30)
+    rows = [
+        (r["event_id"], r["contact_hash"], r["summary"], orjson.dumps(r["metadata"]).decode(), "2026-01-01")
+        for r in records
+    ]
+    with sqlite3.connect(tmp_path / "rag.sqlite") as conn:
+        conn.executemany(
+            "INSERT INTO rag_chunks(event_id, contact_hash, summary, metadata_json, created_at) "
+            "VALUES(?, ?, ?, ?, ?)",
+            rows,
+        )
+    vectors = _vectors(30)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    (tmp_path / "rag.index.ids.json").write_bytes(orjson.dumps(list(range(1, 31))))
+    if backend == "faiss":
+        index = rag_store.faiss.IndexFlatIP(DIM)
+        index.add(vectors)
+        rag_store.faiss.write_index(index, str(tmp_path / "rag.index"))
+    else:
+        np.save(tmp_path / "rag.matrix.npy", vectors)
+
+    store = RagStore(tmp_path)
+
+    assert sorted(store._manifest) == sorted(CONTACTS)
+    assert (tmp_path / "indexes" / "manifest.json").exists()
+    results = store.query(contact_hash="contact_b", query_embedding=vectors[4], k=3)
+    assert results[0].event_id == "evt_4"
+    assert results[0].score == pytest.approx(1.0, abs=1e-3)
+    assert {result.contact_hash for result in results} == {"contact_b"}
+
+    # The manifest now wins over the legacy files, so a reopen must not migrate again.
+    reopened = RagStore(tmp_path)
+    reopened_results = reopened.query(contact_hash="contact_b", query_embedding=vectors[4], k=3)
+    assert [r.event_id for r in reopened_results] == [r.event_id for r in results]
+    assert len(reopened._shard("contact_b").ids) == 10
+
+
+@pytest.mark.skipif(rag_store.faiss is None, reason="faiss not installed")
+def test_large_shard_promotes_to_hnsw_and_reloads(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(rag_store, "HNSW_PROMOTION_THRESHOLD", 20)
+    vectors = _vectors(45)
+    records = [{**record, "contact_hash": "contact_a"} for record in _records(45)]
+    # Exhaustive ranking to compare against; efSearch covers the whole graph at this size.
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = [f"evt_{idx}" for idx in np.argsort(-(unit @ unit[30]))[:4]]
+
+    store = RagStore(tmp_path)
+    store.add_records(records[:15], vectors[:15])
+    assert not isinstance(store._shard("contact_a").index, rag_store.faiss.IndexHNSW)
+
+    store.add_records(records[15:], vectors[15:])
+    index = store._shard("contact_a").index
+    assert isinstance(index, rag_store.faiss.IndexHNSW)
+    assert index.ntotal == 45
+    results = store.query(contact_hash="contact_a", query_embedding=vectors[30], k=4)
+    assert [result.event_id for result in results] == expected
+
+    reopened = RagStore(tmp_path)
+    reloaded = reopened._shard("contact_a").index
+    assert isinstance(reloaded, rag_store.faiss.IndexHNSW)
+    assert reloaded.hnsw.efSearch == rag_store.HNSW_EF_SEARCH
+    reopened_results = reopened.query(contact_hash="contact_a", query_embedding=vectors[30], k=4)
+    assert [result.event_id for result in reopened_results] == expected
@@ -1,10 +1,27 @@
 from __future__ import annotations
 
+import operator
 from datetime import datetime, timedelta, timezone
 
-from app.models import MetadataEvent
-from app.scoring import clamp_score, compute_relationship_score, risk_level_for_score, train_temporal_decay
+import numpy as np
+import pytest
 
+from app import scoring
+from app.models import INTENT_CODES, INTERACTION_CODES, MetadataEvent
+from app.scoring import (
+    DEFAULT_INTENT_WEIGHT,
+    INTENT_WEIGHTS,
+    INTERACTION_WEIGHTS,
+    W_INTENT,
+    W_INTERACTION,
+    clamp_score,
+    compute_relationship_score,
+    risk_level_for_score,
+    train_temporal_decay,
+)
+
+NOW = datetime(2026, 2, 28, tzinfo=timezone.utc)
+SUMMARY_STR = "Synthetic summary text."
 
 
 def _event(
@@ -15,14 +32,15 @@ def _event(
     ts: datetime,
     intent: str = "check_in",
 ) -> MetadataEvent:
-    return MetadataEvent(
+    # Test data is known-good, so skip pydantic validation.
+    return MetadataEvent.model_construct(
         event_id=f"evt_{idx}",
         contact_hash="abc123",
         ts=ts,
         interaction_type=interaction_type,
         sentiment=sentiment,
         intent=intent,
-        summary="Synthetic summary text.",
+        summary=SUMMARY_STR,
         metadata={"source": "test"},
     )
 
@@ -35,76 +53,69 @@ def test_clamp_score_bounds() -> None:
 
 
 
-def test_positive_interactions_raise_score() -> None:
-    now = datetime(2026, 2, 28, tzinfo=timezone.utc)
-    events = [
-        _event(
-            idx=1,
-            interaction_type="call",
-            sentiment=0.9,
-            intent="support",
-            ts=now - timedelta(days=2),
-        ),
-        _event(
-            idx=2,
-            interaction_type="text",
-            sentiment=0.7,
-            intent="follow_up",
-            ts=now - timedelta(days=1),
-        ),
+@pytest.fixture(scope="module")
+def saturated_negative_events() -> list[MetadataEvent]:
+    return [
+        MetadataEvent.model_construct(
+            event_id=f"evt_{i}",
+            contact_hash="abc123",
+            ts=NOW - timedelta(hours=40 - i),
+            interaction_type="ignored_message",
+            sentiment=-1.0,
+            intent="check_in",
+            summary=SUMMARY_STR,
+            metadata={"source": "test"},
+        )
+        for i in range(40)
     ]
 
-    score = compute_relationship_score(events, previous_score=50.0, as_of=now)
-    assert score > 50.0
 
-
-
-def test_negative_interactions_reduce_score() -> None:
-    now = datetime(2026, 2, 28, tzinfo=timezone.utc)
-    events = [
-        _event(
-            idx=1,
-            interaction_type="ignored_message",
-            sentiment=-0.9,
-            ts=now - timedelta(days=3),
+@pytest.mark.parametrize(
+    ("specs", "previous_score", "compare"),
+    [
+        pytest.param(
+            [("call", 0.9, "support", 2), ("text", 0.7, "follow_up", 1)],
+            50.0,
+            operator.gt,
+            id="positive-raises",
         ),
-        _event(
-            idx=2,
-            interaction_type="missed_call",
-            sentiment=-0.7,
-            ts=now - timedelta(days=1),
+        pytest.param(
+            [("ignored_message", -0.9, "check_in", 3), ("missed_call", -0.7, "check_in", 1)],
+            70.0,
+            operator.lt,
+            id="negative-reduces",
         ),
+    ],
+)
+def test_interactions_move_score(specs, previous_score: float, compare) -> None:
+    events = [
+        _event(
+            idx=idx,
+            interaction_type=interaction_type,
+            sentiment=sentiment,
+            intent=intent,
+            ts=NOW - timedelta(days=days_ago),
+        )
+        for idx, (interaction_type, sentiment, intent, days_ago) in enumerate(specs, start=1)
     ]
 
-    score = compute_relationship_score(events, previous_score=70.0, as_of=now)
-    assert score < 70.0
-
-
+    score = compute_relationship_score(events, previous_score=previous_score, as_of=NOW)
+    assert compare(score, previous_score)
 
-def test_score_always_stays_between_zero_and_hundred() -> None:
-    now = datetime(2026, 2, 28, tzinfo=timezone.utc)
-    events = []
 
-    for i in range(40):
-        events.append(
-            _event(
-                idx=i,
-                interaction_type="ignored_message",
-                sentiment=-1.0,
-                ts=now - timedelta(hours=40 - i),
-            )
-        )
-
-    score = compute_relationship_score(events, previous_score=95.0, as_of=now)
+@pytest.mark.parametrize("previous_score", [0.0, 95.0, 100.0])
+def test_score_always_stays_between_zero_and_hundred(
+    saturated_negative_events: list[MetadataEvent], previous_score: float
+) -> None:
+    score = compute_relationship_score(saturated_negative_events, previous_score=previous_score, as_of=NOW)
     assert 0.0 <= score <= 100.0
 
 
 def test_temporal_decay_training_stays_in_bounds() -> None:
-    now = datetime(2026, 2, 28, tzinfo=timezone.utc)
     events = [
-        _event(idx=1, interaction_type="text", sentiment=0.3, ts=now - timedelta(days=10)),
-        _event(idx=2, interaction_type="call", sentiment=0.4, ts=now - timedelta(days=7)),
-        _event(idx=3, interaction_type="ignored_message", sentiment=-0.2, ts=now - timedelta(days=1)),
+        _event(idx=1, interaction_type="text", sentiment=0.3, ts=NOW - timedelta(days=10)),
+        _event(idx=2, interaction_type="call", sentiment=0.4, ts=NOW - timedelta(days=7)),
+        _event(idx=3, interaction_type="ignored_message", sentiment=-0.2, ts=NOW - timedelta(days=1)),
     ]
 
     trained = train_temporal_decay(events, base_lambda=0.08)
@@ -115,3 +126,36 @@ def test_risk_level_escalates_with_anomaly() -> None:
     assert risk_level_for_score(82.0, anomaly_detected=False) == "low"
     assert risk_level_for_score(60.0, anomaly_detected=False) == "medium"
     assert risk_level_for_score(82.0, anomaly_detected=True) == "high"
+
+
+def test_weight_tables_match_weight_dicts() -> None:
+    for interaction_type, weight in INTERACTION_WEIGHTS.items():
+        for intent in [*INTENT_WEIGHTS, "unlisted_intent"]:
+            event = _event(idx=1, interaction_type=interaction_type, sentiment=0.0, ts=NOW, intent=intent)
+            assert W_INTERACTION[event.interaction_code] == weight
+            assert W_INTENT[event.intent_code] == INTENT_WEIGHTS.get(intent, DEFAULT_INTENT_WEIGHT)
+
+
+@pytest.mark.skipif(not scoring._NUMBA_AVAILABLE, reason="numba not installed")
+def test_score_kernel_matches_numpy_fallback() -> None:
+    rng = np.random.default_rng(7)
+    for n in (1, 2, 50, 500):
+        ts = np.sort(rng.uniform(0.0, 30 * 86400.0, size=n))
+        it_idx = rng.integers(0, len(scoring.W_INTERACTION), size=n).astype(np.int8)
+        intent_idx = rng.integers(0, len(scoring.W_INTENT), size=n).astype(np.int8)
+        sent = rng.uniform(-1.0, 1.0, size=n)
+        args = (ts, it_idx, intent_idx, sent, 60.0, ts[-1] + 86400.0, 0.08, 0.05, 6.0, 1.0, 0.0, 100.0)
+
+        assert scoring._score_kernel(*args) == pytest.approx(scoring._score_numpy(*args), abs=1e-9)
+
+
+def test_model_copy_recomputes_derived_event_fields() -> None:
+    event = _event(idx=1, interaction_type="text", sentiment=0.2, ts=NOW - timedelta(days=2))
+    assert event.ts_epoch == (NOW - timedelta(days=2)).timestamp()
+
+    moved = event.model_copy(update={"ts": NOW, "interaction_type": "call", "intent": "support"})
+
+    assert moved.ts_epoch == NOW.timestamp()
+    assert moved.interaction_code == INTERACTION_CODES["call"]
+    assert moved.intent_code == INTENT_CODES["support"]
+    assert event.ts_epoch == (NOW - timedelta(days=2)).timestamp()
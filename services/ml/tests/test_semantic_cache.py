@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.semantic_cache import SemanticCache
+
+
+def _state(**overrides) -> dict:
+    state = {
+        "contact_hash": "abc123",
+        "alias": "Alex",
+        "current_score": 61.24,
+        "previous_score": 58.0,
+        "recent_event_count_7d": 3,
+        "prior_event_count_7d": 5,
+        "recent_metadata": [{"event_id": f"evt_{i}"} for i in range(15)],
+    }
+    state.update(overrides)
+    return state
+
+
+def test_key_includes_alias() -> None:
+    assert SemanticCache.key_for(_state(alias="Alex")) != SemanticCache.key_for(_state(alias="Maya"))
+
+
+def test_key_rounds_scores_to_one_decimal() -> None:
+    base = SemanticCache.key_for(_state(current_score=61.24, previous_score=58.01))
+
+    assert SemanticCache.key_for(_state(current_score=61.16, previous_score=57.96)) == base
+    assert SemanticCache.key_for(_state(current_score=61.36)) != base
+    assert SemanticCache.key_for(_state(previous_score=58.2)) != base
+    assert SemanticCache.key_for(_state(previous_score=None)) != base
+
+
+def test_key_never_merges_scores_across_a_threshold() -> None:
+    # 44.96 and 45.04 both round to 45.0 but fall on opposite sides of the 45 band/priority cut.
+    for below, above in ((44.96, 45.04), (74.96, 75.04)):
+        assert SemanticCache.key_for(_state(current_score=below)) != SemanticCache.key_for(
+            _state(current_score=above)
+        )
+
+    # A 14.96 vs 15.04 point drop straddles the score-drop anomaly threshold.
+    below = _state(current_score=50.04, previous_score=65.0)
+    above = _state(current_score=49.96, previous_score=65.0)
+    assert SemanticCache.key_for(below) != SemanticCache.key_for(above)
+
+
+def test_key_only_uses_last_ten_event_ids() -> None:
+    events = [{"event_id": f"evt_{i}"} for i in range(15)]
+    base = SemanticCache.key_for(_state(recent_metadata=events))
+
+    older_changed = [{"event_id": "evt_other"}] + events[1:]
+    assert SemanticCache.key_for(_state(recent_metadata=older_changed)) == base
+    assert SemanticCache.key_for(_state(recent_metadata=events[-10:])) == base
+
+    newest_changed = events[:-1] + [{"event_id": "evt_other"}]
+    assert SemanticCache.key_for(_state(recent_metadata=newest_changed)) != base
+    assert SemanticCache.key_for(_state(recent_metadata=events[-9:])) != base
+
+
+def test_get_or_compute_reuses_cached_value() -> None:
+    cache = SemanticCache()
+    calls = []
+
+    async def compute() -> dict:
+        calls.append(1)
+        return {"draft_message": "Hey"}
+
+    async def run() -> tuple[dict, dict]:
+        key = SemanticCache.key_for(_state())
+        return await cache.get_or_compute(key, compute), await cache.get_or_compute(key, compute)
+
+    first, second = asyncio.run(run())
+    assert first is second
+    assert len(calls) == 1